@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Boolean
+from sqlalchemy import create_engine, event, Index, Column, Integer, String, DateTime, Float, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -7,11 +7,27 @@ from datetime import datetime
 SQLALCHEMY_DATABASE_URL = "sqlite:///./logs.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 
+# Tune every new SQLite connection: WAL lets the analytics readers run
+# alongside log/alert writes, and NORMAL sync avoids an fsync per commit
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-16000")  # ~16 MB
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA journal_size_limit=6144000")
+    cursor.close()
+
 # Create declarative base
 Base = declarative_base()
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps inserted rows readable after commit without
+# a refresh SELECT (id and column defaults are already populated at flush)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 class Log(Base):
     __tablename__ = "logs"
@@ -45,9 +61,22 @@ class AnomalyMetrics(Base):
     threshold = Column(Float)
     is_anomaly = Column(Boolean, default=False)
 
+# Composite indexes for the level/is_resolved filters ordered by newest first
+Index("ix_logs_level_ts", Log.level, Log.timestamp.desc())
+Index("ix_alerts_resolved_ts", Alert.is_resolved, Alert.timestamp.desc())
+
+# Keyset pagination indexes on (timestamp, id)
+Index("ix_logs_ts_id", Log.timestamp.desc(), Log.id.desc())
+Index("ix_alerts_ts_id", Alert.timestamp.desc(), Alert.id.desc())
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# create_all skips tables that already exist, so add any missing indexes
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -3,8 +3,15 @@ import time
 from datetime import datetime
 from typing import Dict, List
 
+STACK_TRACE_TEMPLATE = """Exception: {message}
+    at Service.processRequest (/services/main.py:42:18)
+    at async Handler.execute (/handlers/base.py:120:22)
+    at async Server.handleRequest (/server/core.py:88:12)"""
+
 class LogGenerator:
     def __init__(self):
+        # Dedicated RNG so generation doesn't share state with the global random module
+        self.rng = random.Random()
         self.services = ["web-server", "database", "auth-service", "payment-service", "user-service"]
         self.normal_messages = [
             "Request processed successfully",
@@ -30,72 +37,85 @@ class LogGenerator:
         self.error_codes = ["ERR001", "ERR002", "ERR003", "ERR004", "ERR005"]
 
     def generate_stack_trace(self, error_message: str) -> str:
-        return f"""Exception: {error_message}
-    at Service.processRequest (/services/main.py:42:18)
-    at async Handler.execute (/handlers/base.py:120:22)
-    at async Server.handleRequest (/server/core.py:88:12)"""
+        return STACK_TRACE_TEMPLATE.format(message=error_message)
 
     def generate_normal_log(self) -> Dict:
-        service = random.choice(self.services)
+        service = self.rng.choice(self.services)
         return {
             "level": "INFO",
             "service": service,
-            "message": random.choice(self.normal_messages),
+            "message": self.rng.choice(self.normal_messages),
             "error_code": None,
             "stack_trace": None
         }
 
     def generate_warning_log(self) -> Dict:
-        service = random.choice(self.services)
+        service = self.rng.choice(self.services)
         return {
             "level": "WARNING",
             "service": service,
-            "message": random.choice(self.warning_messages),
+            "message": self.rng.choice(self.warning_messages),
             "error_code": None,
             "stack_trace": None
         }
 
     def generate_error_log(self) -> Dict:
-        service = random.choice(self.services)
-        message = random.choice(self.error_messages)
+        service = self.rng.choice(self.services)
+        message = self.rng.choice(self.error_messages)
         return {
             "level": "ERROR",
             "service": service,
             "message": message,
-            "error_code": random.choice(self.error_codes),
+            "error_code": self.rng.choice(self.error_codes),
             "stack_trace": self.generate_stack_trace(message)
         }
 
+    def generate_warning_logs(self, count: int) -> List[Dict]:
+        """Generate several warning logs, drawing each field for the whole batch at once"""
+        services = self.rng.choices(self.services, k=count)
+        messages = self.rng.choices(self.warning_messages, k=count)
+        return [
+            {
+                "level": "WARNING",
+                "service": service,
+                "message": message,
+                "error_code": None,
+                "stack_trace": None
+            }
+            for service, message in zip(services, messages)
+        ]
+
     def generate_anomaly_metrics(self) -> Dict:
         metrics = {
-            "error_rate": random.uniform(0, 0.1),
-            "response_time": random.uniform(100, 500),
-            "cpu_usage": random.uniform(20, 95),
-            "memory_usage": random.uniform(30, 90)
+            "error_rate": self.rng.uniform(0, 0.1),
+            "response_time": self.rng.uniform(100, 500),
+            "cpu_usage": self.rng.uniform(20, 95),
+            "memory_usage": self.rng.uniform(30, 90)
         }
         return metrics
 
     def generate_burst_errors(self, count: int) -> List[Dict]:
         """Generate a burst of error logs to simulate an incident"""
-        service = random.choice(self.services)
-        error_message = random.choice(self.error_messages)
-        error_code = random.choice(self.error_codes)
+        service = self.rng.choice(self.services)
+        error_message = self.rng.choice(self.error_messages)
+        error_code = self.rng.choice(self.error_codes)
+        # Every log in the burst shares the same message, so build the trace once
+        stack_trace = self.generate_stack_trace(error_message)
         
-        burst_logs = []
-        for _ in range(count):
-            log = {
+        return [
+            {
                 "level": "ERROR",
                 "service": service,
                 "message": error_message,
                 "error_code": error_code,
-                "stack_trace": self.generate_stack_trace(error_message)
+                "stack_trace": stack_trace
             }
-            burst_logs.append(log)
-        return burst_logs
+            for _ in range(count)
+        ]
 
     def simulate_normal_traffic(self) -> Dict:
         """Simulate normal traffic with occasional warnings"""
-        rand = random.random()
+        rand = self.rng.random()
         if rand < 0.8:  # 80% normal logs
             return self.generate_normal_log()
         elif rand < 0.95:  # 15% warning logs
@@ -107,8 +127,7 @@ class LogGenerator:
         """Simulate an incident with burst errors and related warnings"""
         logs = []
         # Generate warning signs
-        for _ in range(2):
-            logs.append(self.generate_warning_log())
+        logs.extend(self.generate_warning_logs(2))
         
         # Generate burst of errors
         logs.extend(self.generate_burst_errors(5))
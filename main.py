@@ -1,19 +1,40 @@
 from fastapi import FastAPI, WebSocket, Depends, BackgroundTasks, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from typing import List, Dict
+from datetime import datetime
+from typing import List, Dict, Optional
 import json
 import asyncio
 import logging
-from collections import defaultdict
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 
-from .database import get_db, Log, Alert, AnomalyMetrics
+from .database import get_db, SessionLocal, Log, Alert, AnomalyMetrics
 from .models import LogCreate, AlertCreate, LogAnalytics, AlertSummary
+from .models import Log as LogModel, Alert as AlertModel
 from .log_generator import LogGenerator
 
-app = FastAPI(title="Log Aggregation POC")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the broadcast and log-writer workers for the lifetime of the app"""
+    # Queues are created here so they belong to the running event loop.
+    # Keep task references so the tasks aren't garbage collected.
+    app.state.broadcast_queue = asyncio.Queue()
+    app.state.broadcaster = asyncio.create_task(broadcaster(app.state.broadcast_queue))
+    app.state.log_write_queue = asyncio.Queue()
+    app.state.log_writer = asyncio.create_task(log_writer(app.state.log_write_queue))
+    yield
+    workers = [app.state.broadcaster, app.state.log_writer]
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+app = FastAPI(title="Log Aggregation POC", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -27,8 +48,9 @@ app.add_middleware(
 # Initialize log generator
 log_generator = LogGenerator()
 
-# Store active WebSocket connections
-active_connections: List[WebSocket] = []
+# Store active WebSocket connections, each with its own bounded outgoing queue
+CLIENT_QUEUE_SIZE = 100
+active_connections: Dict[WebSocket, asyncio.Queue] = {}
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,55 +61,211 @@ THRESHOLDS = {
     "error_rate": 0.05,  # 5% error rate threshold
     "error_burst": 5,    # 5 errors within burst_window
     "burst_window": 60,  # 60 seconds window
+    "alert_cooldown": 60,  # Suppress repeat burst alerts for 60 seconds
 }
 
-# In-memory storage for recent errors (for burst detection)
-recent_errors: List[datetime] = []
+# Ring buffer of the last error_burst error times (for burst detection),
+# as time.monotonic() seconds so wall-clock jumps don't affect the window
+recent_errors: deque = deque(maxlen=THRESHOLDS["error_burst"])
+# No burst alerts are raised before this monotonic time
+suppress_until = 0.0
+# check_for_anomalies runs from the background task threadpool
+recent_errors_lock = threading.Lock()
+
+# Short-lived cache of analytics responses, keyed by endpoint.
+# Entries are (expires_at, response) and are dropped whenever new data is written.
+# Each key also has a generation, bumped on invalidation, so a response computed
+# before a write is never cached after it.
+ANALYTICS_CACHE_TTL = 2  # seconds
+LOGS_ANALYTICS_KEY = "logs_analytics"
+ALERTS_ANALYTICS_KEY = "alerts_analytics"
+analytics_cache: Dict[str, tuple] = {}
+analytics_generations: Dict[str, int] = {}
+analytics_cache_lock = threading.Lock()
+
+def get_cached_analytics(key: str):
+    """Return a cached analytics response if it has not expired"""
+    entry = analytics_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def get_analytics_generation(key: str) -> int:
+    return analytics_generations.get(key, 0)
+
+def set_cached_analytics(key: str, response: Dict, generation: int):
+    """Cache response unless key was invalidated since generation was read"""
+    with analytics_cache_lock:
+        if analytics_generations.get(key, 0) == generation:
+            analytics_cache[key] = (time.monotonic() + ANALYTICS_CACHE_TTL, response)
+
+def invalidate_analytics(key: str):
+    with analytics_cache_lock:
+        analytics_generations[key] = analytics_generations.get(key, 0) + 1
+        analytics_cache.pop(key, None)
+
+def queue_for_client(queue: asyncio.Queue, message):
+    """Queue message for one client, dropping its oldest message if full"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+def broadcast_message(message: Dict):
+    """Queue message for every connected client"""
+    for queue in list(active_connections.values()):
+        queue_for_client(queue, message)
+
+async def client_sender(websocket: WebSocket, queue: asyncio.Queue):
+    """Send queued messages to a single client so a slow one only delays itself.
+
+    This is the only task that writes to the socket: str messages are sent
+    as text, anything else as JSON.
+    """
+    try:
+        while True:
+            message = await queue.get()
+            if isinstance(message, str):
+                await websocket.send_text(message)
+            else:
+                await websocket.send_json(message)
+    except Exception as e:
+        logger.error(f"Error broadcasting message to client: {str(e)}")
+        active_connections.pop(websocket, None)
+
+# Logs waiting to be pushed to WebSocket clients are coalesced by broadcaster()
+BROADCAST_INTERVAL = 0.02  # seconds between batches
+BROADCAST_MAX_BATCH = 100
+
+async def broadcaster(queue: asyncio.Queue):
+    """Send queued logs to all clients as batch messages, one batch per tick"""
+    while True:
+        batch = [await queue.get()]
+        while not queue.empty() and len(batch) < BROADCAST_MAX_BATCH:
+            batch.append(queue.get_nowait())
+        broadcast_message({"type": "batch", "data": batch})
+        await asyncio.sleep(BROADCAST_INTERVAL)
+
+def queue_broadcast(log: Dict):
+    """Queue a log for broadcast, dropping it if the broadcaster isn't running"""
+    task = getattr(app.state, "broadcaster", None)
+    if task is None or task.done():
+        return
+    app.state.broadcast_queue.put_nowait(log)
+
+# Logs waiting to be committed by log_writer() are queued with a future
+# that resolves to the inserted Log row
+LOG_WRITE_MAX_BATCH = 500
+LOG_WRITE_MAX_DELAY = 0.01  # seconds to wait for more logs before committing
+LOG_WRITE_TIMEOUT = 5  # seconds a request waits for its log to be committed
+
+def write_logs(log_dicts: List[Dict]) -> List[Log]:
+    """Insert a batch of logs in a single transaction"""
+    db = SessionLocal()
+    try:
+        db_logs = [Log(**log_dict) for log_dict in log_dicts]
+        db.add_all(db_logs)
+        db.commit()
+        return db_logs
+    finally:
+        db.close()
+
+def fail_log_writes(items: List[tuple], error: Exception):
+    for _, future in items:
+        if not future.done():
+            future.set_exception(error)
 
-async def broadcast_message(message: Dict):
-    """Broadcast message to all connected clients"""
-    for connection in active_connections:
+async def log_writer(queue: asyncio.Queue):
+    """Commit queued logs in batches so concurrent requests share one transaction"""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
         try:
-            await connection.send_json(message)
-        except:
-            logger.error("Error broadcasting message to client")
+            deadline = loop.time() + LOG_WRITE_MAX_DELAY
+            while len(items) < LOG_WRITE_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Skip logs whose request already timed out or went away, so a
+            # client that was told the write failed doesn't get a duplicate
+            items = [item for item in items if not item[1].done()]
+            if not items:
+                continue
+            db_logs = await asyncio.to_thread(write_logs, [log_dict for log_dict, _ in items])
+        except asyncio.CancelledError:
+            fail_log_writes(items, RuntimeError("Log writer stopped"))
+            raise
+        except Exception as e:
+            # Fail this batch but keep the writer running for the next one
+            logger.error(f"Error writing log batch: {str(e)}")
+            fail_log_writes(items, e)
+            continue
+        
+        invalidate_analytics(LOGS_ANALYTICS_KEY)
+        for (_, future), db_log in zip(items, db_logs):
+            if not future.done():
+                future.set_result(db_log)
 
 def check_for_anomalies(log: Dict, db: Session) -> bool:
     """Check for anomalies in log patterns"""
-    is_anomaly = False
+    global suppress_until
     
-    # Clean up old errors from recent_errors
-    current_time = datetime.utcnow()
-    global recent_errors
-    recent_errors = [t for t in recent_errors if t > current_time - timedelta(seconds=THRESHOLDS["burst_window"])]
+    if log["level"] != "ERROR":
+        return False
     
-    if log["level"] == "ERROR":
+    current_time = time.monotonic()
+    with recent_errors_lock:
         recent_errors.append(current_time)
         
-        # Check for error burst
-        if len(recent_errors) >= THRESHOLDS["error_burst"]:
-            is_anomaly = True
-            create_alert(db, {
-                "severity": "HIGH",
-                "message": f"Error burst detected: {len(recent_errors)} errors in {THRESHOLDS['burst_window']} seconds",
-                "log_id": log.get("id", 0)
-            })
+        # The buffer holds the last error_burst errors, so a burst is simply
+        # the oldest of them falling inside the window
+        if len(recent_errors) < THRESHOLDS["error_burst"]:
+            return False
+        if current_time - recent_errors[0] >= THRESHOLDS["burst_window"]:
+            return False
+        if current_time < suppress_until:
+            return False
+        suppress_until = current_time + THRESHOLDS["alert_cooldown"]
     
-    return is_anomaly
+    create_alert(db, {
+        "severity": "HIGH",
+        "message": f"Error burst detected: {THRESHOLDS['error_burst']} errors in {THRESHOLDS['burst_window']} seconds",
+        "log_id": log.get("id", 0)
+    })
+    return True
+
+def check_for_anomalies_task(log: Dict):
+    """Run check_for_anomalies with a session owned by the background task.
+
+    The request's session is closed by get_db before background tasks run,
+    so it must not be handed to them.
+    """
+    db = SessionLocal()
+    try:
+        check_for_anomalies(log, db)
+    finally:
+        db.close()
 
 def create_alert(db: Session, alert_data: Dict):
     """Create a new alert"""
     alert = Alert(**alert_data)
     db.add(alert)
     db.commit()
-    db.refresh(alert)
+    invalidate_analytics(ALERTS_ANALYTICS_KEY)
     return alert
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    sender = None
     try:
         await websocket.accept()
-        active_connections.append(websocket)
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        active_connections[websocket] = queue
+        sender = asyncio.create_task(client_sender(websocket, queue))
         
         # Keep the connection alive
         while True:
@@ -95,149 +273,176 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Wait for any message
                 data = await websocket.receive_text()
                 # Echo back to confirm connection is alive
-                await websocket.send_text(data)
+                queue_for_client(queue, data)
             except Exception as e:
                 logger.error(f"WebSocket error: {str(e)}")
                 break
     except Exception as e:
         logger.error(f"WebSocket connection error: {str(e)}")
     finally:
-        if websocket in active_connections:
-            active_connections.remove(websocket)
-
-@app.post("/logs/", response_model=None)
-async def create_log(log: LogCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    """Create a new log entry"""
-    db_log = Log(**log.dict())
-    db.add(db_log)
-    db.commit()
-    db.refresh(db_log)
+        active_connections.pop(websocket, None)
+        if sender is not None:
+            sender.cancel()
+
+@app.post("/logs/", response_model=LogModel)
+async def create_log(log: LogCreate, background_tasks: BackgroundTasks):
+    """Create a new log entry.
+
+    A 503 after LOG_WRITE_TIMEOUT does not guarantee the log was not stored:
+    logs still queued are dropped, but a batch already being committed
+    completes.
+    """
+    writer = getattr(app.state, "log_writer", None)
+    if writer is None or writer.done():
+        raise HTTPException(status_code=503, detail="Log writer is not running")
+    
+    # Hand the log to the batching writer and wait for its commit
+    log_dict = log.model_dump()
+    future = asyncio.get_running_loop().create_future()
+    app.state.log_write_queue.put_nowait((log_dict, future))
+    try:
+        db_log = await asyncio.wait_for(future, LOG_WRITE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Timed out waiting for log to be written; it may still have been stored"
+        )
     
     # Check for anomalies in background
-    background_tasks.add_task(check_for_anomalies, log.dict(), db)
-    
-    # Broadcast log to connected clients
-    background_tasks.add_task(broadcast_message, {"type": "new_log", "data": log.dict()})
-    
-    # Convert SQLAlchemy model to dict for response
-    return {
-        "id": db_log.id,
-        "timestamp": db_log.timestamp,
-        "level": db_log.level,
-        "service": db_log.service,
-        "message": db_log.message,
-        "error_code": db_log.error_code,
-        "stack_trace": db_log.stack_trace
-    }
+    background_tasks.add_task(check_for_anomalies_task, {**log_dict, "id": db_log.id})
+    
+    # Queue log for broadcast to connected clients
+    queue_broadcast(log_dict)
+    
+    return db_log
+
+@app.get("/logs/", response_model=List[LogModel])
+def get_logs(
+    skip: int = 0,
+    limit: int = 100,
+    before_ts: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Get paginated logs, newest first.
 
-@app.get("/logs/", response_model=None)
-def get_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get paginated logs"""
-    logs = db.query(Log).order_by(Log.timestamp.desc()).offset(skip).limit(limit).all()
-    return [
-        {
-            "id": log.id,
-            "timestamp": log.timestamp,
-            "level": log.level,
-            "service": log.service,
-            "message": log.message,
-            "error_code": log.error_code,
-            "stack_trace": log.stack_trace
-        }
-        for log in logs
-    ]
-
-@app.get("/alerts/", response_model=None)
-def get_alerts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get paginated alerts"""
-    alerts = db.query(Alert).order_by(Alert.timestamp.desc()).offset(skip).limit(limit).all()
-    return [
-        {
-            "id": alert.id,
-            "timestamp": alert.timestamp,
-            "severity": alert.severity,
-            "message": alert.message,
-            "log_id": alert.log_id,
-            "is_resolved": alert.is_resolved,
-            "resolved_at": alert.resolved_at
-        }
-        for alert in alerts
-    ]
-
-@app.get("/analytics/logs", response_model=None)
+    Pass the timestamp and id of the last log on the previous page as
+    before_ts/before_id to fetch the next page without an OFFSET scan.
+    """
+    if (before_ts is None) != (before_id is None):
+        raise HTTPException(status_code=422, detail="before_ts and before_id must be given together")
+    
+    query = db.query(Log).order_by(Log.timestamp.desc(), Log.id.desc())
+    if before_ts is not None:
+        # Row-value comparison lets SQLite seek ix_logs_ts_id without a sort
+        query = query.filter(tuple_(Log.timestamp, Log.id) < (before_ts, before_id))
+    else:
+        query = query.offset(skip)
+    logs = query.limit(limit).all()
+    return logs
+
+@app.get("/alerts/", response_model=List[AlertModel])
+def get_alerts(
+    skip: int = 0,
+    limit: int = 100,
+    before_ts: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Get paginated alerts, newest first.
+
+    Pass the timestamp and id of the last alert on the previous page as
+    before_ts/before_id to fetch the next page without an OFFSET scan.
+    """
+    if (before_ts is None) != (before_id is None):
+        raise HTTPException(status_code=422, detail="before_ts and before_id must be given together")
+    
+    query = db.query(Alert).order_by(Alert.timestamp.desc(), Alert.id.desc())
+    if before_ts is not None:
+        # Row-value comparison lets SQLite seek ix_alerts_ts_id without a sort
+        query = query.filter(tuple_(Alert.timestamp, Alert.id) < (before_ts, before_id))
+    else:
+        query = query.offset(skip)
+    alerts = query.limit(limit).all()
+    return alerts
+
+@app.get("/analytics/logs", response_model=LogAnalytics)
 def get_log_analytics(db: Session = Depends(get_db)):
     """Get log analytics"""
-    total_logs = db.query(Log).count()
-    error_count = db.query(Log).filter(Log.level == "ERROR").count()
-    warning_count = db.query(Log).filter(Log.level == "WARNING").count()
+    cached = get_cached_analytics(LOGS_ANALYTICS_KEY)
+    if cached is not None:
+        return cached
+    generation = get_analytics_generation(LOGS_ANALYTICS_KEY)
+    
+    # Count logs by level in a single grouped query
+    level_counts = dict(db.query(Log.level, func.count()).group_by(Log.level).all())
+    total_logs = sum(level_counts.values())
+    error_count = level_counts.get("ERROR", 0)
+    warning_count = level_counts.get("WARNING", 0)
     error_rate = error_count / total_logs if total_logs > 0 else 0
     recent_errors = db.query(Log).filter(Log.level == "ERROR").order_by(Log.timestamp.desc()).limit(5).all()
     
-    return {
+    response = {
         "total_logs": total_logs,
         "error_count": error_count,
         "warning_count": warning_count,
         "error_rate": error_rate,
-        "recent_errors": [
-            {
-                "id": log.id,
-                "timestamp": log.timestamp,
-                "level": log.level,
-                "service": log.service,
-                "message": log.message,
-                "error_code": log.error_code,
-                "stack_trace": log.stack_trace
-            }
-            for log in recent_errors
-        ]
+        "recent_errors": recent_errors
     }
+    set_cached_analytics(LOGS_ANALYTICS_KEY, response, generation)
+    return response
 
-@app.get("/analytics/alerts", response_model=None)
+@app.get("/analytics/alerts", response_model=AlertSummary)
 def get_alert_analytics(db: Session = Depends(get_db)):
     """Get alert analytics"""
-    total_alerts = db.query(Alert).count()
+    cached = get_cached_analytics(ALERTS_ANALYTICS_KEY)
+    if cached is not None:
+        return cached
+    generation = get_analytics_generation(ALERTS_ANALYTICS_KEY)
+    
     active_alerts = db.query(Alert).filter(Alert.is_resolved == False).count()
     
     # Count alerts by severity
-    severity_counts = defaultdict(int)
-    for alert in db.query(Alert).all():
-        severity_counts[alert.severity] += 1
+    severity_counts = dict(db.query(Alert.severity, func.count()).group_by(Alert.severity).all())
+    total_alerts = sum(severity_counts.values())
     
     recent_alerts = db.query(Alert).order_by(Alert.timestamp.desc()).limit(5).all()
     
-    return {
+    response = {
         "total_alerts": total_alerts,
         "active_alerts": active_alerts,
-        "alerts_by_severity": dict(severity_counts),
-        "recent_alerts": [
-            {
-                "id": alert.id,
-                "timestamp": alert.timestamp,
-                "severity": alert.severity,
-                "message": alert.message,
-                "log_id": alert.log_id,
-                "is_resolved": alert.is_resolved,
-                "resolved_at": alert.resolved_at
-            }
-            for alert in recent_alerts
-        ]
+        "alerts_by_severity": severity_counts,
+        "recent_alerts": recent_alerts
     }
+    set_cached_analytics(ALERTS_ANALYTICS_KEY, response, generation)
+    return response
 
-@app.post("/simulate/normal")
-async def simulate_normal_traffic(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.post("/simulate/normal", response_model=LogModel)
+async def simulate_normal_traffic(background_tasks: BackgroundTasks):
     """Simulate normal traffic with occasional warnings and errors"""
+    # Generated logs always have the LogCreate shape, so skip validation
     log_data = log_generator.simulate_normal_traffic()
-    log = LogCreate(**log_data)
-    return await create_log(log, background_tasks, db)
+    log = LogCreate.model_construct(**log_data)
+    return await create_log(log, background_tasks)
 
 @app.post("/simulate/incident")
-async def simulate_incident(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def simulate_incident(background_tasks: BackgroundTasks):
     """Simulate an incident with burst errors"""
-    logs = []
-    for log_data in log_generator.simulate_incident():
-        log = LogCreate(**log_data)
-        db_log = await create_log(log, background_tasks, db)
-        logs.append(db_log)
+    # Generated logs already have the LogCreate shape, so use them as-is
+    logs = log_generator.simulate_incident()
+    
+    # Insert the whole burst in a single transaction, off the event loop
+    db_logs = await asyncio.to_thread(write_logs, logs)
+    invalidate_analytics(LOGS_ANALYTICS_KEY)
+    
+    # Check for anomalies in background
+    for log_dict, db_log in zip(logs, db_logs):
+        background_tasks.add_task(check_for_anomalies_task, {**log_dict, "id": db_log.id})
+    
+    # Queue the burst for broadcast to connected clients
+    for log_dict in logs:
+        queue_broadcast(log_dict)
+    
     return {"message": "Incident simulated", "logs_generated": len(logs)}
 
 # Mount static files after all API routes
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import Optional, List
 
@@ -16,8 +16,7 @@ class Log(LogBase):
     id: int
     timestamp: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AlertBase(BaseModel):
     severity: str
@@ -33,8 +32,7 @@ class Alert(AlertBase):
     is_resolved: bool
     resolved_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AnomalyMetricBase(BaseModel):
     metric_name: str
@@ -49,8 +47,7 @@ class AnomalyMetric(AnomalyMetricBase):
     timestamp: datetime
     is_anomaly: bool
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class LogAnalytics(BaseModel):
     total_logs: int
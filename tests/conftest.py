@@ -0,0 +1,31 @@
+import importlib
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    # database.py opens ./logs.db and main.py mounts ./static, so run the app
+    # from a scratch directory to keep the tracked logs.db untouched
+    workdir = tmp_path_factory.mktemp("app")
+    (workdir / "static").mkdir()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "log_analytics", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+        )
+        package = importlib.util.module_from_spec(spec)
+        sys.modules["log_analytics"] = package
+        spec.loader.exec_module(package)
+        yield importlib.import_module("log_analytics.main")
+    finally:
+        os.chdir(cwd)
+        for name in [m for m in sys.modules if m == "log_analytics" or m.startswith("log_analytics.")]:
+            del sys.modules[name]
@@ -0,0 +1,16 @@
+def test_invalidation_during_query_is_not_cached(app_module):
+    key = app_module.LOGS_ANALYTICS_KEY
+    generation = app_module.get_analytics_generation(key)
+    # A write lands after the handler queried but before it cached
+    app_module.invalidate_analytics(key)
+    app_module.set_cached_analytics(key, {"total_logs": 0}, generation)
+    assert app_module.get_cached_analytics(key) is None
+
+
+def test_analytics_cached_until_invalidated(app_module):
+    key = app_module.ALERTS_ANALYTICS_KEY
+    response = {"total_alerts": 0}
+    app_module.set_cached_analytics(key, response, app_module.get_analytics_generation(key))
+    assert app_module.get_cached_analytics(key) is response
+    app_module.invalidate_analytics(key)
+    assert app_module.get_cached_analytics(key) is None
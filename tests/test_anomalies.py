@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+ERROR = {"level": "ERROR", "id": 1}
+
+
+@pytest.fixture
+def detector(app_module, monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    alerts = []
+    monkeypatch.setattr(app_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(app_module, "create_alert", lambda db, alert_data: alerts.append(alert_data))
+    monkeypatch.setattr(app_module, "suppress_until", 0.0)
+    app_module.recent_errors.clear()
+
+    def errors(count, spacing=1.0):
+        """Report count errors spacing seconds apart and return how many alerted"""
+        fired = 0
+        for _ in range(count):
+            fired += app_module.check_for_anomalies(ERROR, None)
+            clock.now += spacing
+        return fired
+
+    yield SimpleNamespace(errors=errors, alerts=alerts, clock=clock, thresholds=app_module.THRESHOLDS)
+    app_module.recent_errors.clear()
+
+
+def test_below_burst_threshold(detector):
+    assert detector.errors(detector.thresholds["error_burst"] - 1) == 0
+    assert detector.alerts == []
+
+
+def test_burst_inside_window_alerts_once(detector):
+    assert detector.errors(detector.thresholds["error_burst"]) == 1
+    assert len(detector.alerts) == 1
+    assert detector.alerts[0]["log_id"] == ERROR["id"]
+
+
+def test_second_burst_inside_cooldown_suppressed(detector):
+    burst = detector.thresholds["error_burst"]
+    assert detector.errors(burst) == 1
+    assert detector.errors(burst) == 0
+
+    # Once the cooldown has passed, a new burst alerts again
+    detector.clock.now += detector.thresholds["alert_cooldown"]
+    assert detector.errors(burst) == 1
+
+
+def test_errors_spread_wider_than_window(detector):
+    burst = detector.thresholds["error_burst"]
+    # Any error_burst consecutive errors span more than burst_window
+    spacing = detector.thresholds["burst_window"] / (burst - 1) + 1
+    assert detector.errors(burst * 2, spacing=spacing) == 0
+
+
+def test_non_errors_ignored(app_module, detector):
+    for _ in range(detector.thresholds["error_burst"] * 2):
+        assert app_module.check_for_anomalies({"level": "INFO"}, None) is False
+    assert len(app_module.recent_errors) == 0
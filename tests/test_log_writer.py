@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+LOG = {"level": "INFO", "service": "web-server", "message": "Request processed successfully"}
+
+
+def test_create_log_after_restart(app_module):
+    # Each startup runs on a fresh event loop, so the writer queue must not outlive it
+    for _ in range(2):
+        with TestClient(app_module.app) as client:
+            assert client.post("/logs/", json=LOG).status_code == 200
+
+
+def test_writer_survives_failed_batch(app_module, monkeypatch):
+    write_logs = app_module.write_logs
+    calls = []
+
+    def fail_once(log_dicts):
+        calls.append(log_dicts)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        return write_logs(log_dicts)
+
+    monkeypatch.setattr(app_module, "write_logs", fail_once)
+    with TestClient(app_module.app, raise_server_exceptions=False) as client:
+        assert client.post("/logs/", json=LOG).status_code == 500
+        assert client.post("/logs/", json=LOG).status_code == 200
+
+
+def test_writer_skips_abandoned_logs(app_module, monkeypatch):
+    written = []
+
+    def record_write(log_dicts):
+        written.extend(log_dicts)
+        return [None] * len(log_dicts)
+
+    monkeypatch.setattr(app_module, "write_logs", record_write)
+
+    async def run():
+        queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        abandoned, waiting = loop.create_future(), loop.create_future()
+        abandoned.cancel()
+        queue.put_nowait(({"message": "abandoned"}, abandoned))
+        queue.put_nowait(({"message": "waiting"}, waiting))
+        writer = asyncio.create_task(app_module.log_writer(queue))
+        await waiting
+        writer.cancel()
+
+    asyncio.run(run())
+    assert written == [{"message": "waiting"}]
+
+
+def test_writer_fails_in_flight_logs_on_shutdown(app_module, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_write(log_dicts):
+        started.set()
+        release.wait()
+        return [None] * len(log_dicts)
+
+    monkeypatch.setattr(app_module, "write_logs", blocking_write)
+
+    async def run():
+        queue = asyncio.Queue()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait(({"message": "in flight"}, future))
+        writer = asyncio.create_task(app_module.log_writer(queue))
+        await asyncio.to_thread(started.wait)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        release.set()
+        return future
+
+    future = asyncio.run(run())
+    assert isinstance(future.exception(), RuntimeError)
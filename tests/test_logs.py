@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+LOG = {"level": "INFO", "service": "web-server", "message": "Request processed successfully"}
+
+
+def test_create_log(app_module):
+    with TestClient(app_module.app) as client:
+        response = client.post("/logs/", json=LOG)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] > 0
+    assert body["message"] == LOG["message"]
+
+
+def test_create_log_without_writer(app_module):
+    # Without the context manager startup never runs, so no writer exists
+    app_module.app.state.log_writer = None
+    response = TestClient(app_module.app).post("/logs/", json=LOG)
+    assert response.status_code == 503
+
+
+def test_simulate_incident(app_module):
+    with TestClient(app_module.app) as client:
+        response = client.post("/simulate/incident")
+    assert response.status_code == 200
+    assert response.json() == {"message": "Incident simulated", "logs_generated": 7}
+
+
+def test_broadcaster_survives_restart(app_module):
+    # Each startup runs on a fresh event loop, so queues must not outlive it
+    for _ in range(2):
+        with TestClient(app_module.app) as client:
+            assert client.post("/simulate/incident").status_code == 200
+            assert not app_module.app.state.broadcaster.done()
+
+    # Once shut down, nothing is left queuing up without a consumer
+    app_module.queue_broadcast(LOG)
+    assert app_module.app.state.broadcast_queue.empty()
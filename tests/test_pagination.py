@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client(app_module):
+    base = datetime(2024, 1, 1)
+    db = app_module.SessionLocal()
+    try:
+        # Pairs of rows share a timestamp so the id tiebreak is exercised
+        for i in range(10):
+            timestamp = base + timedelta(seconds=i // 2)
+            db.add(app_module.Log(
+                timestamp=timestamp, level="INFO", service="web-server", message=f"log {i}"
+            ))
+            db.add(app_module.Alert(
+                timestamp=timestamp, severity="LOW", message=f"alert {i}", log_id=i
+            ))
+        db.commit()
+    finally:
+        db.close()
+    return TestClient(app_module.app)
+
+
+@pytest.mark.parametrize("path", ["/logs/", "/alerts/"])
+def test_offset_pagination(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    rows = response.json()
+    assert len(rows) >= 10
+    keys = [(row["timestamp"], row["id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+    page = client.get(path, params={"skip": 3, "limit": 4}).json()
+    assert page == rows[3:7]
+
+
+@pytest.mark.parametrize("path", ["/logs/", "/alerts/"])
+def test_keyset_pagination(client, path):
+    rows = client.get(path).json()
+
+    pages = []
+    params = {"limit": 3}
+    while True:
+        page = client.get(path, params=params).json()
+        if not page:
+            break
+        pages.extend(page)
+        params = {"limit": 3, "before_ts": page[-1]["timestamp"], "before_id": page[-1]["id"]}
+    assert pages == rows
+
+
+@pytest.mark.parametrize("path", ["/logs/", "/alerts/"])
+@pytest.mark.parametrize("params", [{"before_ts": "2024-01-01T00:00:03"}, {"before_id": 5}])
+def test_partial_cursor_rejected(client, path, params):
+    assert client.get(path, params=params).status_code == 422
@@ -0,0 +1,26 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+
+def test_broadcast_drops_oldest_when_full(app_module, monkeypatch):
+    queue = asyncio.Queue(maxsize=2)
+    monkeypatch.setattr(app_module, "active_connections", {"client": queue})
+    for i in range(3):
+        app_module.broadcast_message({"n": i})
+    assert [queue.get_nowait() for _ in range(queue.qsize())] == [{"n": 1}, {"n": 2}]
+
+
+def test_echo_and_broadcast_share_sender(app_module):
+    with TestClient(app_module.app) as client:
+        with client.websocket_connect("/ws") as websocket:
+            websocket.send_text("ping")
+            assert websocket.receive_text() == "ping"
+
+            assert client.post("/simulate/incident").status_code == 200
+            received = []
+            while len(received) < 7:
+                message = websocket.receive_json()
+                assert message["type"] == "batch"
+                received.extend(message["data"])
+            assert len(received) == 7